@@ -1,15 +1,38 @@
-from flask import Flask, request, render_template, jsonify, redirect, url_for, session
+from flask import Flask, request, render_template, jsonify, redirect, url_for, session, make_response
+from flask_compress import Compress
 import pika
 import json
 from flask_cors import CORS
-from functools import wraps
+from functools import wraps, lru_cache
 import mysql.connector
+from mysql.connector import pooling
+import hashlib
+import os
+import threading
 from werkzeug.security import check_password_hash
+from traffic_recorder import TrafficRecorder, redact_search
+from profiling import is_profiling, start_profiling, stop_profiling, tag_message, timed
 
 app = Flask(__name__)
 CORS(app)
 app.secret_key = 'sua_chave_secreta_aqui'  # Adicione uma chave secreta para sessão
 
+# Compressão gzip/brotli das respostas HTML e JSON
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'application/json']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+Compress(app)
+
+# Tempo de cache (em segundos) da página de login; as páginas autenticadas são
+# sempre revalidadas para não continuarem acessíveis pelo cache após o logout
+PAGE_MAX_AGE = int(os.getenv('PAGE_MAX_AGE', '86400'))
+
+# Gravação do tráfego de /send e /api/clientes para replay (ver replay_traffic.py)
+if os.getenv('TRAFFIC_RECORD_FILE'):
+    TrafficRecorder(app, os.getenv('TRAFFIC_RECORD_FILE'))
+
+# Usuários autorizados a controlar o profiling (separados por vírgula); vazio desativa as rotas
+PROFILING_ADMINS = {u.strip() for u in os.getenv('PROFILING_ADMINS', '').split(',') if u.strip()}
+
 # Configurações do RabbitMQ
 RABBITMQ_HOST = 'localhost'
 RABBITMQ_QUEUE = 'Fila_1'
@@ -22,6 +45,10 @@ DB_CONFIG = {
     'database': 'banco_sistema'
 }
 
+# Recursos inicializados por worker (ver init_worker)
+db_pool = None
+publisher = None
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):  
@@ -30,9 +57,19 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def setup_rabbitmq_connection():
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if session.get('username') not in PROFILING_ADMINS:
+            return jsonify({"status": "error", "message": "Acesso restrito a administradores"}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+def setup_rabbitmq_connection(heartbeat=None):
     try:
-        connection = pika.BlockingConnection(pika.ConnectionParameters(RABBITMQ_HOST))
+        connection = pika.BlockingConnection(
+            pika.ConnectionParameters(RABBITMQ_HOST, heartbeat=heartbeat)
+        )
         channel = connection.channel()
         channel.queue_declare(queue=RABBITMQ_QUEUE, durable=True)
         return connection, channel
@@ -40,6 +77,138 @@ def setup_rabbitmq_connection():
         print(f"Erro ao conectar com RabbitMQ: {str(e)}")
         return None, None
 
+class RabbitMQPublisher:
+    """
+    Mantém uma conexão persistente com o RabbitMQ para publicar na Fila_1,
+    evitando abrir uma conexão nova a cada requisição
+    """
+    def __init__(self):
+        self.connection = None
+        self.channel = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        # Heartbeat desligado: a BlockingConnection só responde heartbeats quando é
+        # chamada, então um worker ocioso teria a conexão derrubada pelo broker.
+        # Conexões mortas são detectadas na publicação, que reconecta uma vez
+        self.connection, self.channel = setup_rabbitmq_connection(heartbeat=0)
+        return self.channel is not None
+
+    def publish(self, body):
+        """
+        Publica a mensagem, reconectando uma vez caso a conexão tenha caído
+        :param body: corpo da mensagem já serializado
+        :return: True se a mensagem foi publicada
+        """
+        with self.lock:
+            for tentativa in range(2):
+                if (not self.connection or self.connection.is_closed) and not self.connect():
+                    return False
+                try:
+                    self.channel.basic_publish(
+                        exchange='',
+                        routing_key=RABBITMQ_QUEUE,
+                        body=body,
+                        properties=pika.BasicProperties(
+                            delivery_mode=2,
+                            content_type='application/json'
+                        )
+                    )
+                    return True
+                except pika.exceptions.AMQPError:
+                    self.close()
+                    if tentativa == 1:
+                        raise
+            return False
+
+    def close(self):
+        try:
+            if self.connection and not self.connection.is_closed:
+                self.connection.close()
+        except Exception as e:
+            print(f"Erro ao fechar conexão com RabbitMQ: {str(e)}")
+        finally:
+            self.connection, self.channel = None, None
+
+def init_worker(pool_size):
+    """
+    Inicializa o pool de conexões do banco e o publicador do RabbitMQ.
+    Deve ser chamado uma vez por processo (ex.: hook post_fork do gunicorn),
+    nunca antes do fork, pois conexões não podem ser compartilhadas entre processos
+    :param pool_size: conexões abertas pelo worker; deve ser >= threads do worker,
+        senão get_connection() falha com PoolError quando todas estão em uso
+    """
+    global db_pool, publisher
+    db_pool = pooling.MySQLConnectionPool(
+        pool_name=f'banco_pool_{os.getpid()}',
+        pool_size=pool_size,
+        **DB_CONFIG
+    )
+    publisher = RabbitMQPublisher()
+    publisher.connect()
+
+def shutdown_worker():
+    """Fecha a conexão do publicador ao encerrar o worker"""
+    if publisher:
+        publisher.close()
+
+def get_db_connection():
+    """Obtém uma conexão do pool do worker ou, sem pool, abre uma nova"""
+    if db_pool:
+        return db_pool.get_connection()
+    return mysql.connector.connect(**DB_CONFIG)
+
+@lru_cache(maxsize=None)
+def render_static_page(template_name):
+    """
+    Renderiza uma única vez páginas que não dependem de variáveis
+    :return: tupla com o HTML e seu ETag
+    """
+    html = render_template(template_name)
+    return html, hashlib.sha1(html.encode()).hexdigest()
+
+def static_page_response(template_name, max_age=None):
+    """
+    Resposta de página estática com ETag
+    :param template_name: nome do template
+    :param max_age: tempo de cache em segundos; sem ele, o navegador revalida a cada acesso
+    :return: resposta 200 ou 304 caso o cliente já tenha a versão atual
+    """
+    html, etag = render_static_page(template_name)
+    # ETags fracos: o Flask-Compress reescreve os fortes (ex.: "abc:br"),
+    # o que faria o If-None-Match nunca bater aqui
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(html)
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+def get_clientes_version(cursor):
+    """
+    Lê o contador de versão da tabela usuarios, incrementado pelo DatabaseConsumer
+    a cada inserção
+    :return: versão atual (0 se ainda não houve inserção registrada) ou None se a
+        consulta falhar, por exemplo quando a tabela versao_tabelas não existe
+    """
+    try:
+        cursor.execute("SELECT versao FROM versao_tabelas WHERE tabela = 'usuarios'")
+        row = cursor.fetchone()
+        return row['versao'] if row else 0
+    except mysql.connector.Error:
+        return None
+
+def get_publisher():
+    global publisher
+    if publisher is None:
+        publisher = RabbitMQPublisher()
+    return publisher
+
 # Rota principal redireciona para login
 @app.route('/')
 def index():
@@ -52,8 +221,9 @@ def login():
         username = request.form['username']
         password = request.form['password']
 
+        conn = None
         try:
-            conn = mysql.connector.connect(**DB_CONFIG)
+            conn = get_db_connection()
             cursor = conn.cursor(dictionary=True)
 
             cursor.execute("SELECT * FROM usuarios_sistema WHERE username = %s", (username,))
@@ -69,23 +239,23 @@ def login():
         except Exception as e:
             return render_template('login.html', error="Erro ao fazer login")
         finally:
-            if conn.is_connected():
+            if conn and conn.is_connected():
                 cursor.close()
                 conn.close()
 
-    return render_template('login.html')
+    return static_page_response('login.html', max_age=PAGE_MAX_AGE)
 
 # Rota do menu principal
 @app.route('/menu')
 @login_required
 def menu():
-    return render_template('menu.html')
+    return static_page_response('menu.html')
 
 # Rota para o formulário de cadastro
 @app.route('/cadastro')
 @login_required
 def cadastro():
-    return render_template('form.html')
+    return static_page_response('form.html')
 
 # Rota para processar o formulário
 @app.route('/send', methods=['POST'])
@@ -102,23 +272,12 @@ def send_form():
             "saldo": float(request.form['saldo'])
         }
 
-        connection, channel = setup_rabbitmq_connection()
-        if not connection or not channel:
-            return jsonify({
-                "status": "error",
-                "message": "Erro ao conectar com o serviço de mensageria"
-            }), 500
-
         try:
-            channel.basic_publish(
-                exchange='',
-                routing_key=RABBITMQ_QUEUE,
-                body=json.dumps(usuario),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,
-                    content_type='application/json'
-                )
-            )
+            if not get_publisher().publish(json.dumps(usuario)):
+                return jsonify({
+                    "status": "error",
+                    "message": "Erro ao conectar com o serviço de mensageria"
+                }), 500
 
             return jsonify({
                 "status": "success",
@@ -131,10 +290,6 @@ def send_form():
                 "message": f"Erro ao enviar mensagem: {str(e)}"
             }), 500
 
-        finally:
-            if connection and not connection.is_closed:
-                connection.close()
-
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -150,17 +305,30 @@ def logout():
 @app.route('/consulta')
 @login_required
 def consulta():
-    return render_template('consulta.html')
+    return static_page_response('consulta.html')
 
 @app.route('/api/clientes')
 @login_required
+@timed('buscar_clientes')
 def buscar_clientes():
     search_term = request.args.get('search', '').strip()
+    tag_message(search=redact_search(search_term))
 
+    conn = None
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
+        # Se o cliente já tem a versão atual da tabela, evita refazer a busca
+        version = get_clientes_version(cursor)
+        etag = f'clientes-{version}' if version is not None else None
+        if etag and request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
         if search_term:
             # Busca com filtro
             query = """
@@ -183,15 +351,45 @@ def buscar_clientes():
             if 'saldo' in cliente:
                 cliente['saldo'] = float(cliente['saldo'])
 
-        return jsonify(clientes)
+        response = jsonify(clientes)
+        if etag:
+            response.set_etag(etag, weak=True)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        return response
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
     finally:
-        if conn.is_connected():
+        if conn and conn.is_connected():
             cursor.close()
             conn.close()
 
+# Profiling sob demanda, restrito a PROFILING_ADMINS; com gunicorn, afeta apenas
+# o worker que atender a requisição
+@app.route('/admin/profiling/start', methods=['POST'])
+@login_required
+@admin_required
+def iniciar_profiling():
+    if not start_profiling():
+        return jsonify({"status": "error", "message": "Profiling já está ativo", "pid": os.getpid()}), 409
+    return jsonify({"status": "success", "message": "Profiling iniciado", "pid": os.getpid()})
+
+@app.route('/admin/profiling/stop', methods=['POST'])
+@login_required
+@admin_required
+def parar_profiling():
+    result = stop_profiling()
+    if result is None:
+        return jsonify({"status": "error", "message": "Profiling não está ativo", "pid": os.getpid()}), 409
+    return jsonify({"status": "success", "pid": os.getpid(), **result})
+
+@app.route('/admin/profiling')
+@login_required
+@admin_required
+def status_profiling():
+    return jsonify({"active": is_profiling(), "pid": os.getpid()})
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
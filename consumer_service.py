@@ -4,12 +4,13 @@ import re
 import logging
 from typing import Tuple, List, Dict, Any, Union
 
+from logging_config import configure_logging, get_message_logger, sample_message
+from profiling import install_signal_handler, tag_message, timed
+
 # Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
+message_logger = get_message_logger(__name__)
 
 class BusinessRuleConsumer:
     def __init__(self, host: str = 'localhost'):
@@ -32,7 +33,7 @@ class BusinessRuleConsumer:
             self.channel.basic_qos(prefetch_count=1)
             
         except Exception as e:
-            logger.error(f"Erro ao conectar ao RabbitMQ: {str(e)}")
+            logger.error("Erro ao conectar ao RabbitMQ: %s", e)
             raise
 
     def validate_cpf(self, cpf: str) -> Tuple[bool, str]:
@@ -98,6 +99,7 @@ class BusinessRuleConsumer:
             return False, "Telefone deve ter 10 ou 11 dígitos numéricos"
         return True, ""
 
+    @timed('validate_user_data')
     def validate_user_data(self, user_data: Dict[str, Any]) -> Tuple[bool, List[str]]:
         """
         Realiza todas as validações nos dados do usuário
@@ -142,14 +144,14 @@ class BusinessRuleConsumer:
             is_valid, errors = self.validate_user_data(user_data)
             
             if is_valid:
-                logger.info(f"Dados validados com sucesso: {user_data}")
+                message_logger.info("Dados validados com sucesso: %s", user_data)
                 return {
                     'status': 'success',
                     'data': user_data,
                     'errors': None
                 }
             else:
-                logger.warning(f"Falha na validação dos dados: {errors}")
+                logger.warning("Falha na validação dos dados: %s", errors)
                 return {
                     'status': 'error',
                     'data': user_data,
@@ -157,7 +159,7 @@ class BusinessRuleConsumer:
                 }
                 
         except Exception as e:
-            logger.error(f"Erro ao processar a mensagem: {e}")
+            logger.error("Erro ao processar a mensagem: %s", e)
             return {
                 'status': 'error',
                 'data': None,
@@ -166,10 +168,15 @@ class BusinessRuleConsumer:
         finally:
             ch.basic_ack(delivery_tag=method.delivery_tag)
 
+    @timed('callback')
     def callback(self, ch, method, properties, body: bytes) -> None:
+        sample_message()
+        tag_message(delivery_tag=method.delivery_tag)
         try:
             user_data = json.loads(body)
-            logger.info(f"Mensagem recebida: {user_data}")
+            message_logger.info("Mensagem recebida: %s", user_data)
+            if isinstance(user_data, dict):
+                tag_message(conta=user_data.get('conta'))
             
             # Chama process_message com todos os parâmetros necessários
             result = self.process_message(ch, method, properties, body)
@@ -184,7 +191,7 @@ class BusinessRuleConsumer:
                         content_type='application/json'
                     )
                 )
-                logger.info("Mensagem processada e enviada para Fila_2")
+                message_logger.info("Mensagem processada e enviada para Fila_2")
             else:
                 self.channel.basic_publish(
                     exchange='',
@@ -200,7 +207,7 @@ class BusinessRuleConsumer:
                         content_type='application/json'
                     )
                 )
-                logger.info("Mensagem com erro reenviada para Fila_1")
+                message_logger.info("Mensagem com erro reenviada para Fila_1")
                 
         except json.JSONDecodeError as e:
             logger.error("Erro: Mensagem não está no formato JSON válido")
@@ -216,7 +223,7 @@ class BusinessRuleConsumer:
             )
             
         except Exception as e:
-            logger.error(f"Erro no processamento: {str(e)}")
+            logger.error("Erro no processamento: %s", e)
             self.channel.basic_publish(
                 exchange='',
                 routing_key='Fila_1',
@@ -234,13 +241,14 @@ class BusinessRuleConsumer:
                 queue='Fila_1',
                 on_message_callback=self.callback
             )
+            install_signal_handler()
             logger.info('Consumidor iniciado. Aguardando mensagens...')
             self.channel.start_consuming()
             
         except KeyboardInterrupt:
             self.stop()
         except Exception as e:
-            logger.error(f"Erro durante o consumo: {str(e)}")
+            logger.error("Erro durante o consumo: %s", e)
             self.stop()
 
     def stop(self) -> None:
@@ -251,11 +259,11 @@ class BusinessRuleConsumer:
                 self.connection.close()
             logger.info("Conexões fechadas")
         except Exception as e:
-            logger.error(f"Erro ao fechar conexões: {str(e)}")
+            logger.error("Erro ao fechar conexões: %s", e)
 
 if __name__ == "__main__":
     consumer = BusinessRuleConsumer()
     try:
         consumer.start()
     except Exception as e:
-        logger.error(f"Erro fatal: {str(e)}")
\ No newline at end of file
+        logger.error("Erro fatal: %s", e)
\ No newline at end of file
@@ -7,12 +7,13 @@ from typing import Tuple, Dict, Any, Optional
 import os
 from datetime import datetime
 
+from logging_config import configure_logging, get_message_logger, sample_message
+from profiling import install_signal_handler, tag_message, timed
+
 # Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
+message_logger = get_message_logger(__name__)
 
 class DatabaseConsumer:
     def __init__(self, host: str = 'localhost'):
@@ -30,6 +31,7 @@ class DatabaseConsumer:
         
         self.rabbitmq_host = host
         self.setup_rabbitmq_connection()
+        self.setup_version_table()
 
     def setup_rabbitmq_connection(self) -> None:
         """Estabelece conexão com o RabbitMQ e configura as filas"""
@@ -47,7 +49,7 @@ class DatabaseConsumer:
             self.channel.basic_qos(prefetch_count=1)
             
         except Exception as e:
-            logger.error(f"Erro ao conectar ao RabbitMQ: {str(e)}")
+            logger.error("Erro ao conectar ao RabbitMQ: %s", e)
             raise
 
     def get_db_connection(self) -> Optional[mysql.connector.MySQLConnection]:
@@ -58,9 +60,43 @@ class DatabaseConsumer:
         try:
             return mysql.connector.connect(**self.db_config)
         except Error as e:
-            logger.error(f"Erro ao conectar ao banco de dados: {str(e)}")
+            logger.error("Erro ao conectar ao banco de dados: %s", e)
             return None
 
+    def setup_version_table(self) -> None:
+        """Cria a tabela de versões usada pelo ETag de /api/clientes, se não existir"""
+        conn = self.get_db_connection()
+        if not conn:
+            return
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS versao_tabelas (
+                tabela VARCHAR(64) PRIMARY KEY,
+                versao BIGINT NOT NULL DEFAULT 0
+            )
+            ''')
+            conn.commit()
+        except Error as e:
+            logger.error("Erro ao criar tabela de versões: %s", e)
+        finally:
+            if conn.is_connected():
+                cursor.close()
+                conn.close()
+
+    def bump_table_version(self, cursor, tabela: str) -> None:
+        """
+        Incrementa o contador de versão da tabela na mesma transação da escrita
+        :param cursor: Cursor da transação corrente
+        :param tabela: Nome da tabela alterada
+        """
+        cursor.execute('''
+        INSERT INTO versao_tabelas (tabela, versao) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE versao = versao + 1
+        ''', (tabela,))
+
+    @timed('save_to_database')
     def save_to_database(self, user_data: Dict[str, Any]) -> Tuple[bool, str]:
         """
         Salva os dados do usuário no banco de dados
@@ -99,6 +135,7 @@ class DatabaseConsumer:
                 VALUES (%s, %s, %s, NOW())
                 '''
             cursor.execute(trans_query, (usuario_id, 'deposito_inicial', float(user_data['saldo'])))            
+            self.bump_table_version(cursor, 'usuarios')
             conn.commit()
             return True, f"Usuário cadastrado com sucesso. ID: {usuario_id}"
             
@@ -143,6 +180,7 @@ class DatabaseConsumer:
             "timestamp": datetime.now().isoformat()
         }
 
+    @timed('callback')
     def callback(self, ch, method, properties, body: bytes) -> None:
         """
         Callback para processar mensagens recebidas
@@ -151,10 +189,14 @@ class DatabaseConsumer:
         :param properties: Propriedades da mensagem
         :param body: Corpo da mensagem
         """
+        sample_message()
+        tag_message(delivery_tag=method.delivery_tag)
         try:
             # Decodifica a mensagem
             data = json.loads(body)
-            logger.info(f"Mensagem recebida para processamento: {data}")
+            message_logger.info("Mensagem recebida para processamento: %s", data)
+            if isinstance(data, dict) and isinstance(data.get('data'), dict):
+                tag_message(conta=data['data'].get('conta'))
             
             # Processa a mensagem
             result = self.process_message(data)
@@ -170,13 +212,13 @@ class DatabaseConsumer:
                 )
             )
             
-            logger.info(f"Processamento concluído: {result['status']}")
+            message_logger.info("Processamento concluído: %s", result['status'])
             
         except json.JSONDecodeError:
             logger.error("Erro: Mensagem não está no formato JSON válido")
             self.publish_error("Formato JSON inválido", body.decode())
         except Exception as e:
-            logger.error(f"Erro no processamento: {str(e)}")
+            logger.error("Erro no processamento: %s", e)
             self.publish_error(str(e))
         finally:
             ch.basic_ack(delivery_tag=method.delivery_tag)
@@ -208,6 +250,7 @@ class DatabaseConsumer:
                 queue='Fila_2',
                 on_message_callback=self.callback
             )
+            install_signal_handler()
             
             logger.info('Consumidor do banco de dados iniciado. Aguardando mensagens...')
             self.channel.start_consuming()
@@ -216,7 +259,7 @@ class DatabaseConsumer:
             logger.info("Consumidor interrompido pelo usuário")
             self.stop()
         except Exception as e:
-            logger.error(f"Erro durante o consumo de mensagens: {str(e)}")
+            logger.error("Erro durante o consumo de mensagens: %s", e)
             self.stop()
 
     def stop(self) -> None:
@@ -228,11 +271,11 @@ class DatabaseConsumer:
                 self.connection.close()
             logger.info("Conexões fechadas")
         except Exception as e:
-            logger.error(f"Erro ao fechar conexões: {str(e)}")
+            logger.error("Erro ao fechar conexões: %s", e)
 
 if __name__ == "__main__":
     try:
         consumer = DatabaseConsumer()
         consumer.start()
     except Exception as e:
-        logger.error(f"Erro ao iniciar o consumidor: {str(e)}")
\ No newline at end of file
+        logger.error("Erro ao iniciar o consumidor: %s", e)
\ No newline at end of file
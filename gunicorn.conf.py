@@ -0,0 +1,55 @@
+# gunicorn.conf.py
+# Configuração do gunicorn para produção:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+# Recarga graciosa (sem derrubar requisições em andamento): kill -HUP <pid do master>
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Workers e threads por worker
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+
+# Conexões MySQL por worker. O padrão é uma por thread; menos que isso faz
+# get_connection() falhar com PoolError sob carga (o limite do pool do
+# mysql-connector é 32).
+# Orçamento de conexões: workers x DB_POOL_SIZE, mais as do DatabaseConsumer,
+# deve ficar abaixo do max_connections do MySQL (151 por padrão). Em máquinas
+# com muitos núcleos, ajuste GUNICORN_WORKERS (ex.: 16 núcleos -> 33 workers
+# x 4 = 132 conexões).
+db_pool_size = int(os.getenv('DB_POOL_SIZE', threads))
+
+# Keep-alive e timeouts
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Recicla workers periodicamente para evitar acúmulo de memória
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = 100
+
+# O app não é carregado no master: cada worker importa o app e abre
+# suas próprias conexões no post_fork
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Inicializa o pool do banco e o publicador do RabbitMQ em cada worker"""
+    from app import init_worker
+    try:
+        init_worker(db_pool_size)
+        server.log.info("Worker %s inicializado", worker.pid)
+    except Exception as e:
+        server.log.error("Erro ao inicializar worker %s: %s", worker.pid, e)
+
+
+def worker_exit(server, worker):
+    """Fecha as conexões do worker ao encerrar"""
+    from app import shutdown_worker
+    shutdown_worker()
@@ -0,0 +1,127 @@
+# load_test.py
+# Compara requisições/segundo de /send e /api/clientes entre servidores.
+# Exemplo (servidor de desenvolvimento na porta 5000 e gunicorn na 8000):
+#   python load_test.py --url dev=http://localhost:5000 --url gunicorn=http://localhost:8000
+import argparse
+import random
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from typing import Dict, List, Tuple
+
+
+def gerar_cpf() -> str:
+    """Gera um CPF aleatório com dígitos verificadores válidos"""
+    cpf = [random.randint(0, 9) for _ in range(9)]
+    for i in range(9, 11):
+        value = sum(cpf[num] * ((i + 1) - num) for num in range(0, i))
+        cpf.append(((value * 10) % 11) % 10)
+    return ''.join(map(str, cpf))
+
+
+def gerar_usuario() -> Dict[str, str]:
+    cpf = gerar_cpf()
+    return {
+        "nome": f"Cliente Teste {cpf[:4]}",
+        "cpf": cpf,
+        "email": f"teste{cpf}@exemplo.com",
+        "telefone": f"119{random.randint(10000000, 99999999)}",
+        "conta": str(random.randint(10000, 99999999)),
+        "tipo": random.choice(["corrente", "poupanca"]),
+        "saldo": f"{random.uniform(0, 5000):.2f}"
+    }
+
+
+class SemRedirecionamento(urllib.request.HTTPRedirectHandler):
+    """Não segue redirecionamentos: respostas 3xx viram HTTPError"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def login(base_url: str, username: str, password: str) -> urllib.request.OpenerDirector:
+    """
+    Faz login e retorna um opener com o cookie de sessão. O opener retornado não
+    segue redirecionamentos, então uma sessão expirada (302 para /login) aparece
+    como erro em vez de sucesso
+    :param base_url: URL base do servidor
+    :return: opener autenticado
+    """
+    cookies = urllib.request.HTTPCookieProcessor(CookieJar())
+    data = urllib.parse.urlencode({"username": username, "password": password}).encode()
+    response = urllib.request.build_opener(cookies).open(f"{base_url}/login", data=data, timeout=10)
+    response.read()
+    if not response.geturl().rstrip("/").endswith("/menu"):
+        raise RuntimeError(f"Falha no login como '{username}' em {base_url}")
+    return urllib.request.build_opener(cookies, SemRedirecionamento())
+
+
+def executar_requisicao(opener: urllib.request.OpenerDirector, base_url: str, endpoint: str) -> bool:
+    try:
+        if endpoint == "send":
+            data = urllib.parse.urlencode(gerar_usuario()).encode()
+            response = opener.open(f"{base_url}/send", data=data, timeout=30)
+        else:
+            response = opener.open(f"{base_url}/api/clientes?search=Cliente", timeout=30)
+        response.read()
+        return response.status == 200
+    except Exception:
+        # Inclui HTTPError de respostas 3xx, 4xx e 5xx
+        return False
+
+
+def medir(base_url: str, endpoint: str, total: int, concurrency: int,
+          username: str, password: str) -> Tuple[float, int]:
+    """
+    Executa `total` requisições com `concurrency` clientes simultâneos
+    :return: tupla com requisições/segundo e número de erros
+    """
+    openers = [login(base_url, username, password) for _ in range(concurrency)]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        resultados = list(executor.map(
+            lambda i: executar_requisicao(openers[i % concurrency], base_url, endpoint),
+            range(total)
+        ))
+    duracao = time.perf_counter() - inicio
+    return total / duracao, resultados.count(False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga de /send e /api/clientes")
+    parser.add_argument("--url", action="append", required=True,
+                        help="servidor no formato nome=http://host:porta (pode repetir)")
+    parser.add_argument("--endpoint", choices=["send", "clientes", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    args = parser.parse_args()
+
+    endpoints = ["send", "clientes"] if args.endpoint == "all" else [args.endpoint]
+    resultados: List[Tuple[str, str, float, int]] = []
+
+    for alvo in args.url:
+        nome, _, base_url = alvo.partition("=")
+        if not base_url:
+            nome, base_url = alvo, alvo
+        base_url = base_url.rstrip("/")
+        for endpoint in endpoints:
+            try:
+                rps, erros = medir(base_url, endpoint, args.requests, args.concurrency,
+                                   args.username, args.password)
+            except Exception as e:
+                print(f"Erro ao testar {nome} ({endpoint}): {e}")
+                sys.exit(1)
+            resultados.append((nome, endpoint, rps, erros))
+
+    print(f"{'servidor':<15}{'endpoint':<12}{'req/s':>10}{'erros':>8}")
+    for nome, endpoint, rps, erros in resultados:
+        print(f"{nome:<15}{endpoint:<12}{rps:>10.1f}{erros:>8}")
+
+
+if __name__ == "__main__":
+    main()
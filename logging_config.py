@@ -0,0 +1,182 @@
+# logging_config.py
+import atexit
+import logging
+import os
+import queue
+import random
+import re
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Campos com dados pessoais que nunca devem aparecer nos logs
+PII_FIELDS = ('cpf', 'email', 'telefone')
+
+# CPF, email e telefone dentro de textos livres (ex.: mensagens de exceção
+# "Duplicate entry '<cpf>' for key 'cpf'")
+PII_PATTERN = re.compile(
+    r'[\w.%+-]+@[\w.-]+\.[a-zA-Z]{2,}'        # email
+    r'|\b\d{3}\.\d{3}\.\d{3}-\d{2}\b'          # CPF formatado
+    r'|\(?\b\d{2}\)?\s?\d{4,5}-\d{4}\b'         # telefone formatado
+    r'|\b\d{10,11}\b'                        # CPF ou telefone só com dígitos
+)
+
+# Fração das mensagens cujos logs por mensagem são mantidos
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.01'))
+
+_listener: Optional[QueueListener] = None
+_message_sampling = threading.local()
+
+
+def mask_value(value: Any) -> str:
+    """
+    Mascara um valor sensível mantendo apenas os dois últimos caracteres
+    :param value: valor original
+    :return: valor mascarado
+    """
+    text = str(value)
+    if len(text) <= 2:
+        return '***'
+    return '***' + text[-2:]
+
+
+def redact_text(text: str) -> str:
+    """
+    Mascara CPFs, emails e telefones encontrados em um texto
+    :param text: texto livre
+    :return: texto com os valores sensíveis mascarados
+    """
+    return PII_PATTERN.sub(lambda m: mask_value(m.group()), text)
+
+
+def redact(data: Any) -> Any:
+    """
+    Retorna uma cópia dos dados com os campos de PII mascarados
+    :param data: dicionário, lista, exceção ou valor simples
+    :return: cópia com cpf, email e telefone mascarados, inclusive dentro de textos
+    """
+    if isinstance(data, str):
+        return redact_text(data)
+    if isinstance(data, BaseException):
+        return redact_text(str(data))
+    if isinstance(data, dict):
+        return {
+            key: mask_value(value) if key in PII_FIELDS and value else redact(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return type(data)(redact(item) for item in data)
+    return data
+
+
+class PiiRedactionFilter(logging.Filter):
+    """
+    Mascara cpf, email e telefone na mensagem e nos argumentos dos registros de
+    log, incluindo textos e exceções passados como argumento
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, str):
+            record.msg = redact_text(record.msg)
+        if isinstance(record.args, dict):
+            record.args = redact(record.args)
+        elif record.args:
+            record.args = tuple(redact(arg) for arg in record.args)
+        return True
+
+
+def sample_message(rate: Optional[float] = None) -> bool:
+    """
+    Sorteia uma vez, no início do processamento de uma mensagem, se os logs
+    por mensagem da thread serão mantidos; assim uma mensagem amostrada
+    aparece com todas as suas linhas
+    :param rate: fração amostrada (padrão: LOG_SAMPLE_RATE)
+    :return: True se a mensagem foi amostrada
+    """
+    rate = LOG_SAMPLE_RATE if rate is None else rate
+    _message_sampling.keep = rate >= 1.0 or random.random() < rate
+    return _message_sampling.keep
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deixa passar apenas uma fração dos registros de nível INFO ou inferior.
+    Usa a decisão de sample_message() da thread atual; fora de uma mensagem,
+    sorteia por registro
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.rate >= 1.0:
+            return True
+        keep = getattr(_message_sampling, 'keep', None)
+        if keep is None:
+            return random.random() < self.rate
+        return keep
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler que não formata a mensagem na thread chamadora;
+    a formatação fica a cargo do QueueListener
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """
+    Configura o logging assíncrono da aplicação: os registros são colocados
+    em uma fila e escritos por uma thread do QueueListener
+    :param level: nível de log (padrão: variável LOG_LEVEL ou INFO)
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = level or os.getenv('LOG_LEVEL', 'INFO')
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _LazyQueueHandler(log_queue)
+    queue_handler.addFilter(PiiRedactionFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Esvazia a fila de logs e encerra a thread do QueueListener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_message_logger(name: str) -> logging.Logger:
+    """
+    Retorna o logger usado para registros por mensagem, com amostragem
+    controlada pela variável LOG_SAMPLE_RATE (0.0 a 1.0). Chame sample_message()
+    no início de cada mensagem
+    :param name: nome do logger pai
+    :return: logger filho com filtro de amostragem
+    """
+    message_logger = logging.getLogger(f'{name}.mensagens')
+    if not any(isinstance(f, SamplingFilter) for f in message_logger.filters):
+        message_logger.addFilter(
+            SamplingFilter(LOG_SAMPLE_RATE)
+        )
+    return message_logger
@@ -0,0 +1,211 @@
+# profiling.py
+# Profiling opcional, ligado/desligado em tempo de execução:
+#   - consumidores: kill -USR1 <pid> inicia e, no próximo sinal, para e grava os resultados
+#   - Flask: /admin/profiling/start e /admin/profiling/stop (por worker, apenas
+#     para os usuários listados em PROFILING_ADMINS)
+# Ao parar, grava em PROFILE_DIR:
+#   profile-<pid>-<ts>.folded  pilhas amostradas no formato do flamegraph.pl/speedscope
+#   slowest-<pid>-<ts>.json    mensagens mais lentas com o tempo de cada etapa
+import heapq
+import itertools
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))
+SLOWEST_N = int(os.getenv('PROFILE_SLOWEST_N', '20'))
+
+
+class SamplingProfiler:
+    """Amostra periodicamente as pilhas de todas as threads do processo"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.running = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.stacks.clear()
+        self.running.set()
+        self.thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.running.clear()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while self.running.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def write_folded(self, path: str) -> None:
+        """Grava as pilhas no formato 'a;b;c contagem', uma por linha"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class StageTimer:
+    """
+    Mede o tempo das etapas marcadas com @timed. A primeira etapa de uma
+    thread abre um registro (a mensagem ou requisição); as etapas chamadas
+    dentro dela são somadas a esse registro
+    """
+
+    def __init__(self, slowest_n: int = SLOWEST_N):
+        self.enabled = False
+        self.slowest_n = slowest_n
+        self.slowest: List[Any] = []
+        self.counter = itertools.count()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.slowest = []
+
+    def timed(self, stage: str):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                record = getattr(self.local, 'record', None)
+                is_root = record is None
+                if is_root:
+                    record = self.local.record = {"stage": stage, "stages": {}}
+
+                inicio = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    duracao = (time.perf_counter() - inicio) * 1000
+                    record["stages"][stage] = record["stages"].get(stage, 0.0) + duracao
+                    if is_root:
+                        self.local.record = None
+                        record["total_ms"] = duracao
+                        record["timestamp"] = time.time()
+                        self._keep_if_slow(record)
+            return wrapper
+        return decorator
+
+    def tag(self, **info: Any) -> None:
+        """
+        Anexa identificadores (sem PII) ao registro da mensagem em andamento,
+        para saber qual mensagem foi lenta. Sem efeito fora de uma etapa @timed
+        """
+        record = getattr(self.local, 'record', None) if self.enabled else None
+        if record is not None:
+            record.setdefault("info", {}).update(info)
+
+    def _keep_if_slow(self, record: Dict[str, Any]) -> None:
+        item = (record["total_ms"], next(self.counter), record)
+        with self.lock:
+            if len(self.slowest) < self.slowest_n:
+                heapq.heappush(self.slowest, item)
+            elif item[0] > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+
+    def slowest_records(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [record for _, _, record in sorted(self.slowest, reverse=True)]
+
+
+_profiler = SamplingProfiler()
+_stage_timer = StageTimer()
+_state_lock = threading.Lock()
+
+timed = _stage_timer.timed
+tag_message = _stage_timer.tag
+
+
+def is_profiling() -> bool:
+    return _profiler.running.is_set()
+
+
+def start_profiling() -> bool:
+    """
+    Inicia o profiler por amostragem e a medição das etapas
+    :return: False se já estava ativo
+    """
+    with _state_lock:
+        if is_profiling():
+            return False
+        _stage_timer.reset()
+        _stage_timer.enabled = True
+        _profiler.start()
+    logger.info("Profiling iniciado (pid %s)", os.getpid())
+    return True
+
+
+def stop_profiling(output_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Para o profiling e grava os resultados
+    :param output_dir: diretório de saída (padrão: variável PROFILE_DIR ou diretório atual)
+    :return: caminhos gravados e mensagens mais lentas, ou None se não estava ativo
+    """
+    with _state_lock:
+        if not is_profiling():
+            return None
+        _profiler.stop()
+        _stage_timer.enabled = False
+
+    output_dir = output_dir or os.getenv('PROFILE_DIR', '.')
+    sufixo = f"{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}"
+    folded_path = os.path.join(output_dir, f"profile-{sufixo}.folded")
+    slowest_path = os.path.join(output_dir, f"slowest-{sufixo}.json")
+
+    slowest = _stage_timer.slowest_records()
+    _profiler.write_folded(folded_path)
+    with open(slowest_path, 'w', encoding='utf-8') as f:
+        json.dump(slowest, f, indent=2)
+
+    logger.info("Profiling finalizado: %s, %s", folded_path, slowest_path)
+    for record in slowest[:5]:
+        logger.info("Mais lenta: %.1f ms %s %s", record["total_ms"],
+                    record.get("info", {}), record["stages"])
+
+    return {"folded": folded_path, "slowest_file": slowest_path, "slowest": slowest}
+
+
+def toggle_profiling() -> None:
+    if is_profiling():
+        stop_profiling()
+    else:
+        start_profiling()
+
+
+def install_signal_handler(signum: Optional[int] = None) -> None:
+    """
+    Liga/desliga o profiling ao receber o sinal (padrão SIGUSR1).
+    Sem efeito em sistemas sem SIGUSR1 (Windows)
+    """
+    signum = signum or getattr(signal, 'SIGUSR1', None)
+    if signum is None:
+        return
+    # O handler roda na thread principal, que pode estar no meio de uma
+    # mensagem; a gravação dos arquivos fica em outra thread
+    signal.signal(signum, lambda *_: threading.Thread(target=toggle_profiling).start())
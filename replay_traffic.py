@@ -0,0 +1,234 @@
+# replay_traffic.py
+# Reproduz o tráfego gravado por traffic_recorder.py em malha aberta: cada
+# requisição é disparada no instante previsto pela gravação (dividido por --rate),
+# sem esperar as anteriores terminarem. A latência é medida a partir do instante
+# previsto, então atrasos por saturação do cliente também entram na conta.
+# Exemplos:
+#   python replay_traffic.py trafego.jsonl --target http://localhost:5000 --rate 5
+#   python replay_traffic.py trafego.jsonl --target rabbitmq --rate 10
+import argparse
+import itertools
+import json
+import random
+import string
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import pika
+
+from load_test import gerar_usuario, login
+from traffic_recorder import DIGIT_MASK, LETTER_MASK, RECORDED_FORM_FIELDS
+
+RABBITMQ_QUEUE = 'Fila_1'
+
+
+def carregar_gravacao(path: str) -> List[Dict[str, Any]]:
+    """
+    Lê o arquivo JSONL gravado, ignorando linhas inválidas
+    :param path: caminho do arquivo
+    :return: registros ordenados por timestamp
+    """
+    registros = []
+    with open(path, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+            if registro.get('path') in ('/send', '/api/clientes') and 'timestamp' in registro:
+                registros.append(registro)
+    registros.sort(key=lambda r: r['timestamp'])
+    return registros
+
+
+def montar_usuario(registro: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Reaproveita tipo e saldo gravados e gera os demais campos, que a gravação
+    não guarda
+    """
+    usuario = gerar_usuario()
+    form = registro.get('form') or {}
+    for campo in RECORDED_FORM_FIELDS:
+        if form.get(campo):
+            usuario[campo] = form[campo]
+    return usuario
+
+
+def desmascarar(c: str) -> str:
+    if c == DIGIT_MASK:
+        return random.choice(string.digits)
+    if c == LETTER_MASK:
+        return random.choice(string.ascii_lowercase)
+    return c
+
+
+def montar_busca(args: Dict[str, str]) -> Dict[str, str]:
+    """
+    Troca letras e dígitos mascarados na gravação por caracteres aleatórios.
+    O termo mantém tamanho e formato, mas não a seletividade da busca original
+    """
+    return {k: ''.join(desmascarar(c) for c in v) for k, v in args.items()}
+
+
+def percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores))) - 1))
+    return valores[indice]
+
+
+class HttpTarget:
+    def __init__(self, base_url: str, username: str, password: str, sessions: int):
+        """
+        Faz login antes do replay começar, para que o tempo de login não entre nas
+        latências medidas; falha imediatamente se as credenciais forem recusadas
+        :param sessions: número de sessões distribuídas entre as threads
+        """
+        self.base_url = base_url.rstrip('/')
+        self.openers = [login(self.base_url, username, password) for _ in range(sessions)]
+        self.proxima = itertools.count()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def opener(self):
+        """Cada thread recebe uma sessão fixa, distribuídas em rodízio"""
+        if not hasattr(self.local, 'opener'):
+            with self.lock:
+                indice = next(self.proxima)
+            self.local.opener = self.openers[indice % len(self.openers)]
+        return self.local.opener
+
+    def enviar(self, registro: Dict[str, Any]) -> bool:
+        if registro['path'] == '/send':
+            data = urllib.parse.urlencode(montar_usuario(registro)).encode()
+            response = self.opener().open(f"{self.base_url}/send", data=data, timeout=30)
+        else:
+            query = urllib.parse.urlencode(montar_busca(registro.get('args') or {}))
+            response = self.opener().open(f"{self.base_url}/api/clientes?{query}", timeout=30)
+        # O opener não segue redirecionamentos: 3xx (ex.: sessão expirada) é erro
+        response.read()
+        return response.status == 200
+
+
+class RabbitMQTarget:
+    """Publica os cadastros direto na Fila_1, sem passar pelo Flask"""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.local = threading.local()
+
+    def channel(self):
+        if not hasattr(self.local, 'channel'):
+            connection = pika.BlockingConnection(pika.ConnectionParameters(self.host))
+            self.local.channel = connection.channel()
+            self.local.channel.queue_declare(queue=RABBITMQ_QUEUE, durable=True)
+        return self.local.channel
+
+    def enviar(self, registro: Dict[str, Any]) -> bool:
+        usuario: Dict[str, Any] = montar_usuario(registro)
+        usuario['saldo'] = float(usuario['saldo'])
+        self.channel().basic_publish(
+            exchange='',
+            routing_key=RABBITMQ_QUEUE,
+            body=json.dumps(usuario),
+            properties=pika.BasicProperties(
+                delivery_mode=2,
+                content_type='application/json'
+            )
+        )
+        return True
+
+
+def reproduzir(registros: List[Dict[str, Any]], target, rate: float, jitter: float,
+               repeat: int, workers: int) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    """
+    Dispara os registros nos instantes gravados, acelerados por `rate`
+    :param jitter: variação aleatória (fração) aplicada a cada intervalo entre requisições
+    :return: latências (ms) e erros por endpoint, e a duração total em segundos
+    """
+    latencias: Dict[str, List[float]] = {}
+    erros: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def executar(registro: Dict[str, Any], previsto: float) -> None:
+        try:
+            ok = target.enviar(registro)
+        except Exception:
+            ok = False
+        latencia = (time.perf_counter() - previsto) * 1000
+        with lock:
+            latencias.setdefault(registro['path'], []).append(latencia)
+            if not ok:
+                erros[registro['path']] = erros.get(registro['path'], 0) + 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        deslocamento = 0.0
+        for _ in range(repeat):
+            anterior = registros[0]['timestamp']
+            for registro in registros:
+                intervalo = (registro['timestamp'] - anterior) / rate
+                anterior = registro['timestamp']
+                if jitter:
+                    intervalo *= random.uniform(1 - jitter, 1 + jitter)
+                deslocamento += intervalo
+                previsto = inicio + deslocamento
+                espera = previsto - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+                executor.submit(executar, registro, previsto)
+    return latencias, erros, time.perf_counter() - inicio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay do tráfego gravado de /send e /api/clientes")
+    parser.add_argument("arquivo", help="arquivo JSONL gravado (TRAFFIC_RECORD_FILE)")
+    parser.add_argument("--target", default="http://localhost:5000",
+                        help="URL do app Flask ou 'rabbitmq' para publicar direto na Fila_1")
+    parser.add_argument("--rabbitmq-host", default="localhost")
+    parser.add_argument("--rate", type=float, default=1.0, help="multiplicador da taxa original")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="variação aleatória dos intervalos (ex.: 0.2 = ±20%%)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=10, help="sessões logadas no app Flask")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    args = parser.parse_args()
+
+    registros = carregar_gravacao(args.arquivo)
+    if args.target == "rabbitmq":
+        registros = [r for r in registros if r['path'] == '/send']
+        target = RabbitMQTarget(args.rabbitmq_host)
+    else:
+        try:
+            target = HttpTarget(args.target, args.username, args.password, args.sessions)
+        except Exception as e:
+            print(f"Erro ao fazer login em {args.target}: {e}")
+            sys.exit(1)
+
+    if not registros:
+        print("Nenhuma requisição para reproduzir")
+        return
+
+    latencias, erros, duracao = reproduzir(registros, target, args.rate, args.jitter,
+                                           args.repeat, args.workers)
+
+    total = sum(len(v) for v in latencias.values())
+    print(f"{total} requisições em {duracao:.1f}s ({total / duracao:.1f} req/s)")
+    print(f"{'endpoint':<16}{'total':>8}{'erros':>8}{'%erro':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for path, valores in sorted(latencias.items()):
+        valores.sort()
+        n_erros = erros.get(path, 0)
+        print(f"{path:<16}{len(valores):>8}{n_erros:>8}{100 * n_erros / len(valores):>7.1f}%"
+              f"{percentil(valores, 50):>10.1f}{percentil(valores, 90):>10.1f}"
+              f"{percentil(valores, 99):>10.1f}{valores[-1]:>10.1f}")
+    print("(latências em ms, medidas a partir do instante previsto de envio)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# traffic_recorder.py
+# Grava o tráfego real de /send e /api/clientes em JSONL para ser reproduzido
+# depois com replay_traffic.py. Ativado pela variável TRAFFIC_RECORD_FILE.
+# A gravação não guarda dados pessoais: do cadastro ficam só tipo e saldo, e os
+# termos de busca têm letras e dígitos mascarados.
+import json
+import threading
+import time
+
+from flask import g, request
+
+RECORDED_PATHS = ('/send', '/api/clientes')
+
+# Campos do cadastro usados pelo replay; os demais são gerados na reprodução
+RECORDED_FORM_FIELDS = ('tipo', 'saldo')
+
+# Caracteres que substituem dígitos e letras dos termos de busca gravados
+DIGIT_MASK = '#'
+LETTER_MASK = '?'
+
+
+def redact_search(term: str) -> str:
+    """
+    Mascara o termo de busca, que pode ser um nome, CPF ou número de conta,
+    mantendo o tamanho e o tipo de cada caractere para que o replay gere um
+    termo equivalente
+    :param term: termo de busca original
+    :return: termo com dígitos trocados por DIGIT_MASK e letras por LETTER_MASK
+    """
+    return ''.join(
+        DIGIT_MASK if c.isdigit() else LETTER_MASK if c.isalpha() else c
+        for c in term
+    )
+
+
+class TrafficRecorder:
+    def __init__(self, app, path: str):
+        """
+        Registra os hooks de gravação no app Flask
+        :param app: aplicação Flask
+        :param path: arquivo JSONL de saída (aberto em modo append)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a', encoding='utf-8', buffering=1)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+    def before_request(self) -> None:
+        g.traffic_start = time.time()
+
+    def after_request(self, response):
+        """Grava a requisição sem dados pessoais"""
+        if request.path not in RECORDED_PATHS or 'traffic_start' not in g:
+            return response
+
+        record = {
+            "timestamp": g.traffic_start,
+            "method": request.method,
+            "path": request.path,
+            "args": {k: redact_search(v) for k, v in request.args.items()},
+            "form": {k: v for k, v in request.form.items() if k in RECORDED_FORM_FIELDS},
+            "status": response.status_code,
+            "duration_ms": round((time.time() - g.traffic_start) * 1000, 2)
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + '\n')
+        return response
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
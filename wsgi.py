@@ -0,0 +1,7 @@
+# wsgi.py
+# Ponto de entrada para servidores WSGI de produção:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+from app import app
+
+if __name__ == "__main__":
+    print("Use: gunicorn -c gunicorn.conf.py wsgi:app")